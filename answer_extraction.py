@@ -28,44 +28,122 @@ Evals types are:
 """
 
 import ast
+import bisect
+import functools
 import re
 
-from typing import Any
+from typing import Any, Callable, Optional, Union
+
+try:
+  import re2  # pylint: disable=g-import-not-at-top
+except ImportError:
+  re2 = None
+
+
+class _LazyRe:
+  """A regex that is only compiled the first time it is used.
+
+  Used for the three travel patterns (tuple quoting, plan and step), which are
+  the most expensive to compile and are not needed by callers that only score
+  the other tasks.
+  """
+
+  __slots__ = ("_pattern", "_compiled")
+
+  def __init__(self, pattern: str):
+    self._pattern = pattern
+    self._compiled = None
+
+  def _get(self) -> re.Pattern[str]:
+    compiled = self._compiled
+    if compiled is None:
+      compiled = re.compile(self._pattern)
+      self._compiled = compiled
+    return compiled
+
+  def findall(self, string: str) -> list[Any]:
+    return self._get().findall(string)
+
+  def fullmatch(self, string: str) -> Optional[re.Match[str]]:
+    return self._get().fullmatch(string)
+
+  def sub(
+      self, repl: Union[str, Callable[[re.Match[str]], str]], string: str
+  ) -> str:
+    return self._get().sub(repl, string)
+
+
+_TUPLE_RE = _LazyRe(r"\(([^()]+)\)")
+_CODE_BLOCK_START = "```python\n"
+_CODE_BLOCK_END = "```"
+# A travel plan written as a plain list of 3-tuples, with or without quotes.
+# _TRAVEL_PLAN_RE checks the whole plan, with balanced quotes and no commas,
+# newlines or escapes inside a field. Only then can _TRAVEL_STEP_RE read the
+# fields off without building an AST. A field value starts and ends on a
+# non-space character, so it never competes with the \s* around it and long
+# runs of spaces cannot make either pattern backtrack quadratically.
+_TRAVEL_VALUE = (
+    r"[^\s,'\"()\[\]\\](?:[^,'\"()\[\]\\\n]*[^\s,'\"()\[\]\\])?"
+)
+_TRAVEL_FIELD = (
+    r"\s*(?:'" + _TRAVEL_VALUE + r"'|\"" + _TRAVEL_VALUE + r"\"|"
+    + _TRAVEL_VALUE + r")\s*"
+)
+_TRAVEL_STEP = r"\(" + ",".join([_TRAVEL_FIELD] * 3) + r"\)"
+_TRAVEL_PLAN_RE = _LazyRe(
+    r"\[\s*(?:" + _TRAVEL_STEP + r"\s*,\s*)*" + _TRAVEL_STEP
+    + r"\s*(?:,\s*)?\]"
+)
+_TRAVEL_STEP_RE = _LazyRe(
+    r"\("
+    + ",".join([r"\s*['\"]?(" + _TRAVEL_VALUE + r")['\"]?\s*"] * 3)
+    + r"\)"
+)
+_DIGITS_RE = re.compile(r"\d+")
+_COUNT_MULTI_RE = re.compile(r"appear \**\\?\[([^\[\]\n]+)\]\** time")
+_BOXED_RE = re.compile(r"boxed{([^}]*)}")
+
+# Responses are often scored more than once, e.g. across repeated runs. The
+# extractors that return immutable values are cached on the response string.
+_EXTRACTION_CACHE_SIZE = 8192
+
+_FORMATTING_TABLE = str.maketrans("", "", "#*\\")
+
+_TEXT_TO_INT = {
+    "zero": 0,
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "eleven": 11,
+    "twelve": 12,
+    "thirteen": 13,
+    "fourteen": 14,
+    "fifteen": 15,
+    "sixteen": 16,
+    "seventeen": 17,
+    "eighteen": 18,
+    "nineteen": 19,
+    "twenty": 20,
+}
 
 
 def _text_to_int(s: str) -> int:
   """Converts a string name to an integer, e.g. 'five'->5."""
-  text_to_int_dict = {
-      "zero": 0,
-      "one": 1,
-      "two": 2,
-      "three": 3,
-      "four": 4,
-      "five": 5,
-      "six": 6,
-      "seven": 7,
-      "eight": 8,
-      "nine": 9,
-      "ten": 10,
-      "eleven": 11,
-      "twelve": 12,
-      "thirteen": 13,
-      "fourteen": 14,
-      "fifteen": 15,
-      "sixteen": 16,
-      "seventeen": 17,
-      "eighteen": 18,
-      "nineteen": 19,
-      "twenty": 20,
-  }
-  return text_to_int_dict[s] if s in text_to_int_dict else None
+  return _TEXT_TO_INT.get(s)
 
 
 def _insert_quotes_in_tuples(candidate: str) -> str:
   """Converts unquoted tokens inside parentheses into quoted strings.
 
   E.g. (Fresno, Irvine, motorhome) -> ('Fresno', 'Irvine', 'motorhome')
-        (Fort Wayne, Boise, flight) -> ('Fort Wayne', "Boise', 'flight')
+        (Fort Wayne, Boise, flight) -> ('Fort Wayne', 'Boise', 'flight')
 
   Args:
     candidate: The string to modify.
@@ -95,7 +173,24 @@ def _insert_quotes_in_tuples(candidate: str) -> str:
   # Replace each parenthesized group in the candidate string with its quoted
   # version. This only replaces parentheses that do NOT themselves contain
   # parentheses.
-  return re.sub(r"\(([^()]+)\)", replacer, candidate)
+  return _TUPLE_RE.sub(replacer, candidate)
+
+
+def _find_last_code_block(response: str) -> Optional[str]:
+  """Returns the contents of the last ```python code block, if any."""
+  last = None
+  end = 0
+  while True:
+    start = response.find(_CODE_BLOCK_START, end)
+    if start < 0:
+      break
+    start += len(_CODE_BLOCK_START)
+    end = response.find(_CODE_BLOCK_END, start)
+    if end < 0:
+      break
+    last = response[start:end]
+    end += len(_CODE_BLOCK_END)
+  return last
 
 
 def extract_travel_eval(response: str) -> list[tuple[str, str, str]]:
@@ -111,24 +206,31 @@ def extract_travel_eval(response: str) -> list[tuple[str, str, str]]:
     A clean list of tuples representing the travel plan, e.g.,
       [('Austin', 'Anchorage', 'car'),
       ('Anchorage', 'Indianapolis', 'hyperloop'), ...].
-      If an error occurs, returns an empty list.
+      Every field is returned as a string, however it was written in the
+      plan. If an error occurs, returns an empty list.
   """
 
   # Try to match a Python code block first
-  code_block_re = re.compile(r"```python\n(.*?)```", re.DOTALL)
-  matches = code_block_re.findall(response)
+  code_block = _find_last_code_block(response)
 
-  if not matches:
+  if code_block is None:
     return []
   # If a code block is found, try to evaluate it
-  travel_plan_str = matches[-1].strip()
+  travel_plan_str = code_block.strip()
 
-  # Ensure the string is formatted as a valid Python list of tuples
-  travel_plan_str = _insert_quotes_in_tuples(travel_plan_str)
+  # A plain list of 3-tuples is parsed directly, without building an AST
+  if _TRAVEL_PLAN_RE.fullmatch(travel_plan_str):
+    return _TRAVEL_STEP_RE.findall(travel_plan_str)
 
   try:
     # Attempt to evaluate the Python code block as a list of tuples
-    travel_plan = ast.literal_eval(travel_plan_str)
+    try:
+      travel_plan = ast.literal_eval(travel_plan_str)
+    except (ValueError, SyntaxError):
+      # Quote any bare city names or modes of transportation and try again
+      travel_plan = ast.literal_eval(_insert_quotes_in_tuples(travel_plan_str))
+    if not isinstance(travel_plan, (list, tuple)) or not travel_plan:
+      return []
     travel_plan = (
         list(travel_plan)
         if isinstance(travel_plan[0], tuple)
@@ -139,22 +241,43 @@ def extract_travel_eval(response: str) -> list[tuple[str, str, str]]:
     if isinstance(travel_plan, list) and all(
         isinstance(item, tuple) and len(item) == 3 for item in travel_plan
     ):
-      return travel_plan
+      return [tuple(map(str, item)) for item in travel_plan]
     else:
       return []
-  except SyntaxError:
+  except (ValueError, SyntaxError, IndexError, TypeError):
     return []
 
 
 def _remove_text_formatting(response: str) -> str:
-  # Remove any # marks or ** marks or \\ marks around the number
-  response = re.sub(r"#(\d+)", r"\1", response)
-  response = re.sub(r"(\d+)#", r"\1", response)
-  response = re.sub(r"\*\*(\d+)", r"\1", response)
-  response = re.sub(r"(\d+)\*\*", r"\1", response)
-  response = re.sub(r"\\(\d+)", r"\1", response)
-  response = re.sub(r"(\d+)\\", r"\1", response)
-  return response
+  # Remove any # marks or * marks or \\ marks. The input is a single captured
+  # answer, so stripping them everywhere removes the marks around the number.
+  return response.translate(_FORMATTING_TABLE)
+
+
+def _find_count(response: str) -> Optional[str]:
+  """Finds the number in e.g. "The character appears 12 times."
+
+  Takes the first number after "appear" that is followed by "time" on the same
+  line. This is what the regex appear.*?(\\d+).*?time matches, but it is
+  found in linear time without any backtracking.
+
+  Args:
+    response: The response to search.
+
+  Returns:
+    The digits of the count, or None if there is no such sentence.
+  """
+  start = response.find("appear")
+  while start >= 0:
+    line_end = response.find("\n", start)
+    if line_end < 0:
+      line_end = len(response)
+    digits = _DIGITS_RE.search(response, start, line_end)
+    if digits and response.find("time", digits.end(), line_end) >= 0:
+      return digits.group()
+    # A later "appear" on the same line cannot succeed either.
+    start = response.find("appear", line_end)
+  return None
 
 
 def extract_count_eval(response: str, k: int) -> list[int]:
@@ -171,16 +294,12 @@ def extract_count_eval(response: str, k: int) -> list[int]:
   Returns:
     A list of answers extracted from the response.
   """
-  count_re = re.compile(r"appear.*?(\d+).*?time")
-  count_multi_re = re.compile(r".*appear \**\\?\[(.+)?\\?\]\** time")
-
   if k == 1:
     # Single word or character case
-    match_obj = count_re.search(response)
+    s = _find_count(response)
     ans = ""
-    if not match_obj:
+    if s is None:
       return [ans]
-    s = match_obj.group(1)
     s = _remove_text_formatting(s)
     try:
       ans = int(s)
@@ -189,9 +308,9 @@ def extract_count_eval(response: str, k: int) -> list[int]:
     return [ans]
   else:
     # Multiple word case (word counting mode)
-    match_obj = count_multi_re.search(response)
+    match_obj = _COUNT_MULTI_RE.search(response)
     if not match_obj:
-      return [ans] * k
+      return [""] * k
     else:
       ans_list = match_obj.group(1).split(",")
       answers = []
@@ -207,6 +326,7 @@ def extract_count_eval(response: str, k: int) -> list[int]:
       return answers
 
 
+@functools.lru_cache(maxsize=_EXTRACTION_CACHE_SIZE)
 def extract_mathgap_eval(response: str) -> str:
   """Extracts the answer from a response to a mathgap task.
 
@@ -215,7 +335,7 @@ def extract_mathgap_eval(response: str) -> str:
   Returns:
     str: The answer extracted from the response.
   """
-  matches = re.findall(r"boxed{([^}]*)}", response)
+  matches = _BOXED_RE.findall(response)
   answer = None
 
   if not matches:
@@ -226,55 +346,106 @@ def extract_mathgap_eval(response: str) -> str:
     answer = None
   return answer
 
-extract_answer_html = re.compile(r".*<answer>([A-D])</answer>")
-extract_answer_boxed = re.compile(r"boxed\{([A-D])\}")
-extract_answer_sentence = re.compile(r"answer:? ([A-D])")
-extract_answer_sentence2 = re.compile(r"answer is:? ([A-D])")
-extract_answer_sentence2 = re.compile(r"answer.*?([A-D])")
-compiled_res = [extract_answer_html,
-                extract_answer_boxed,
-                extract_answer_sentence,
-                extract_answer_sentence2]
+# The alternatives are listed from most to least specific, and the group number
+# of each alternative is its priority. The first alternative takes the last
+# <answer> tag on a line. The last alternative only captures in a lookahead so
+# that it never consumes a more specific answer further along.
+_LOGIC_RE = re.compile(
+    r"<answer>([A-D])</answer>(?!.*<answer>[A-D]</answer>)"
+    r"|boxed\{([A-D])\}"
+    r"|answer:? ([A-D])"
+    r"|answer is:? ([A-D])"
+    r"|answer(?=.*?([A-D]))"
+)
 
 
+@functools.lru_cache(maxsize=_EXTRACTION_CACHE_SIZE)
 def extract_logic_eval(response: str) -> str:
   """Extracts a multiple choice answer, as needed by the logic tasks."""
-  for comp in compiled_res:
-    match_object = comp.search(response)
-    if match_object:
-      return match_object.group(1)
-  return ""
-
-find_answers = [
-    re.compile(r"boxed\{(.+?)\}"),
-    re.compile(r"Answer.*\*{2}(.+)\*{2}"),
-    re.compile(r"\*{2}Answer:? (.+)\*{2}"),
-    re.compile(r"answer is:? (.+)."),
-    re.compile(r"\*{2}answer is:? (.+)\*{2}"),
-    re.compile(r"Answer: (.+)."),
-    re.compile(r"/$(.+?)/$"),
-]
-
-
+  best = None
+  for match_object in _LOGIC_RE.finditer(response):
+    if best is None or match_object.lastindex < best.lastindex:
+      best = match_object
+      if best.lastindex == 1:
+        break
+  return best.group(best.lastindex) if best else ""
+
+
+def extract_logic_eval_batch(responses: list[str]) -> list[str]:
+  """Same as extract_logic_eval on each response, using a single scan."""
+  # None of the logic patterns match across a newline, so it can separate the
+  # responses even though they contain newlines themselves.
+  starts = []
+  offset = 0
+  for response in responses:
+    starts.append(offset)
+    offset += len(response) + 1
+  best = [None] * len(responses)
+  for match_object in _LOGIC_RE.finditer("\n".join(responses)):
+    index = bisect.bisect_right(starts, match_object.start()) - 1
+    if best[index] is None or match_object.lastindex < best[index].lastindex:
+      best[index] = match_object
+  return [
+      match_object.group(match_object.lastindex) if match_object else ""
+      for match_object in best
+  ]
+
+_UNPUZZLE_PATTERNS = (
+    r"boxed\{(.+?)\}",
+    r"Answer.*\*{2}(.+)\*{2}",
+    r"\*{2}Answer:? (.+)\*{2}",
+    r"answer is:? (.+).",
+    r"\*{2}answer is:? (.+)\*{2}",
+    r"Answer: (.+).",
+    r"/$(.+?)/$",
+)
+# Matches that just echo the answer format from the prompt.
+_UNPUZZLE_PLACEHOLDERS = frozenset({"your answer", "answer"})
+
+# When google-re2 is installed, the patterns run in linear time and a set of
+# all of them finds which ones match in a single scan of the response.
+if re2 is not None:
+  find_answers = [re2.compile(pattern) for pattern in _UNPUZZLE_PATTERNS]
+  _UNPUZZLE_SET = re2.Set.SearchSet()
+  for _pattern in _UNPUZZLE_PATTERNS:
+    _UNPUZZLE_SET.Add(_pattern)
+  _UNPUZZLE_SET.Compile()
+else:
+  find_answers = [re.compile(pattern) for pattern in _UNPUZZLE_PATTERNS]
+  _UNPUZZLE_SET = None
+
+
+@functools.lru_cache(maxsize=_EXTRACTION_CACHE_SIZE)
 def extract_unpuzzle_eval(response: str) -> str:
-  for regex in find_answers:
+  """Extracts the answer to a puzzle or unpuzzle from a free-form response."""
+  if _UNPUZZLE_SET is None:
+    regexes = find_answers
+  else:
+    matching = _UNPUZZLE_SET.Match(response)
+    if not matching:
+      return ""
+    regexes = [find_answers[i] for i in sorted(matching)]
+  for regex in regexes:
     matches = regex.findall(response)
     if matches:
       for s in matches:
-        if s not in ["your answer", "answer"]:
+        if s.lower() not in _UNPUZZLE_PLACEHOLDERS:
           return s
   return ""
 
 
+_EXTRACTORS = {
+    "character_count": lambda e, r: extract_count_eval(r, k=e["k"]),
+    "word_count": lambda e, r: extract_count_eval(r, k=e["k"]),
+    "mathgap_diverse": lambda e, r: extract_mathgap_eval(r),
+    "mathgap_irrelevant": lambda e, r: extract_mathgap_eval(r),
+    "travel": lambda e, r: extract_travel_eval(r),
+    "logic_negation": lambda e, r: extract_logic_eval(r),
+    "logic_evaluation": lambda e, r: extract_logic_eval(r),
+}
+
+
 def extract_eval(json_entry: dict[str, Any], response: str) -> str:
   """Extracts the answer from a response to a task."""
-  if json_entry["task"] in ["character_count", "word_count"]:
-    return extract_count_eval(response, k=json_entry["k"])
-  elif json_entry["task"] in ["mathgap_diverse", "mathgap_irrelevant"]:
-    return extract_mathgap_eval(response)
-  elif json_entry["task"] == "travel":
-    return extract_travel_eval(response)
-  elif json_entry["task"] in ["logic_negation", "logic_evaluation"]:
-    return extract_logic_eval(response)
-  else:
-    return ""
+  extractor = _EXTRACTORS.get(json_entry["task"])
+  return extractor(json_entry, response) if extractor else ""
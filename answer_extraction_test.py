@@ -13,6 +13,9 @@
 # limitations under the License.
 # ==============================================================================
 
+import re
+from unittest import mock
+
 from absl.testing import absltest
 
 import answer_extraction
@@ -33,6 +36,58 @@ class AnswerExtractionTest(absltest.TestCase):
         ),
         "('Fort Wayne', 'Boise', 'flight')",
     )
+    self.assertEqual(
+        answer_extraction._insert_quotes_in_tuples(
+            "('Santa Ana', Boise, \"flight\")"
+        ),
+        "('Santa Ana', 'Boise', \"flight\")",
+    )
+
+  def test_extract_travel_eval(self):
+    self.assertEqual(
+        answer_extraction.extract_travel_eval(
+            "```python\n[('Fresno', 'Irvine', 'motorhome')]\n```"
+        ),
+        [("Fresno", "Irvine", "motorhome")],
+    )
+    self.assertEqual(
+        answer_extraction.extract_travel_eval(
+            "```python\n[(Fresno, Irvine, motorhome),"
+            " (Irvine, Fort Wayne, flight)]\n```"
+        ),
+        [("Fresno", "Irvine", "motorhome"), ("Irvine", "Fort Wayne", "flight")],
+    )
+    self.assertEqual(
+        answer_extraction.extract_travel_eval("```python\n[]\n```"), []
+    )
+    self.assertEqual(
+        answer_extraction.extract_travel_eval("```python\n{}\n```"), []
+    )
+    self.assertEqual(
+        answer_extraction.extract_travel_eval("```python\n{1: 2}\n```"), []
+    )
+    # Fields are strings whichever path parses the plan.
+    self.assertEqual(
+        answer_extraction.extract_travel_eval("```python\n[(1, 2, 3)]\n```"),
+        [("1", "2", "3")],
+    )
+    self.assertEqual(
+        answer_extraction.extract_travel_eval("```python\n((1, 2, 3),)\n```"),
+        [("1", "2", "3")],
+    )
+    # Long runs of spaces must not make the plan patterns backtrack.
+    self.assertEqual(
+        answer_extraction.extract_travel_eval(
+            "```python\n[(A" + " " * 20000 + "'\n```"
+        ),
+        [],
+    )
+    self.assertEqual(
+        answer_extraction.extract_travel_eval(
+            "```python\n[(Santa" + " " * 20000 + "Ana, B, C)]\n```"
+        ),
+        [("Santa" + " " * 20000 + "Ana", "B", "C")],
+    )
 
   def test_make_serializable(self):
     self.assertEqual(
@@ -55,6 +110,12 @@ class AnswerExtractionTest(absltest.TestCase):
     self.assertEqual(answer_extraction._text_to_int("five"), 5)
     self.assertEqual(answer_extraction._text_to_int("twenty"), 20)
 
+  def test_remove_text_formatting(self):
+    self.assertEqual(answer_extraction._remove_text_formatting("#12#"), "12")
+    self.assertEqual(answer_extraction._remove_text_formatting("**12**"), "12")
+    self.assertEqual(answer_extraction._remove_text_formatting("\\12\\"), "12")
+    self.assertEqual(answer_extraction._remove_text_formatting(" 3 "), " 3 ")
+
   def test_extract_count_eval(self):
     self.assertEqual(
         answer_extraction.extract_count_eval(
@@ -68,6 +129,10 @@ class AnswerExtractionTest(absltest.TestCase):
         ),
         [12],
     )
+    self.assertEqual(
+        answer_extraction.extract_count_eval("I could not count them.", 2),
+        ["", ""],
+    )
 
   def test_extract_mathgap_eval(self):
     self.assertEqual(
@@ -96,8 +161,34 @@ class AnswerExtractionTest(absltest.TestCase):
         ),
         "C",
     )
+    self.assertEqual(
+        answer_extraction.extract_logic_eval(
+            "Option A looks like the answer, but it is \\boxed{D}."
+        ),
+        "D",
+    )
+    self.assertEqual(
+        answer_extraction.extract_logic_eval(
+            "The answer is \\boxed{B}.\n<answer>C</answer>"
+        ),
+        "C",
+    )
 
-  def test_extract_unpuzzle_eval(self):
+  def test_extract_logic_eval_batch(self):
+    responses = [
+        "The answer is: A.",
+        "Option A looks like the answer, but it is \\boxed{D}.",
+        "No letter here.",
+        "The answer is \\boxed{B}.\n<answer>C</answer>",
+        "",
+    ]
+    self.assertEqual(
+        answer_extraction.extract_logic_eval_batch(responses),
+        [answer_extraction.extract_logic_eval(r) for r in responses],
+    )
+    self.assertEqual(answer_extraction.extract_logic_eval_batch([]), [])
+
+  def _check_extract_unpuzzle_eval(self):
     self.assertEqual(
         answer_extraction.extract_unpuzzle_eval("The answer is: \\boxed{42}."),
         "42",
@@ -110,6 +201,27 @@ class AnswerExtractionTest(absltest.TestCase):
         answer_extraction.extract_unpuzzle_eval("**Answer: 42**"),
         "42",
     )
+    self.assertEqual(
+        answer_extraction.extract_unpuzzle_eval(
+            "Format: Answer: Your Answer.\nAnswer: no."
+        ),
+        "no",
+    )
+
+  def test_extract_unpuzzle_eval(self):
+    answer_extraction.extract_unpuzzle_eval.cache_clear()
+    self._check_extract_unpuzzle_eval()
+
+  def test_extract_unpuzzle_eval_without_re2(self):
+    # Runs the same cases through the stdlib fallback used without google-re2.
+    answer_extraction.extract_unpuzzle_eval.cache_clear()
+    self.addCleanup(answer_extraction.extract_unpuzzle_eval.cache_clear)
+    with mock.patch.object(
+        answer_extraction,
+        "find_answers",
+        [re.compile(p) for p in answer_extraction._UNPUZZLE_PATTERNS],
+    ), mock.patch.object(answer_extraction, "_UNPUZZLE_SET", None):
+      self._check_extract_unpuzzle_eval()
 
 
 if __name__ == "__main__":
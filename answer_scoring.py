@@ -28,6 +28,7 @@ Tasks are:
 """
 
 
+import operator
 from typing import Mapping, Union
 
 
@@ -46,7 +47,8 @@ def score_travel_eval(
       "city_start": Start city. - "city_end": End city. - "total_budget":
       Maximum allowed budget. - "steps": Minimum number of unique cities to
       visit. - "graph": The graph of connections. - "costs": Costs of
-      transportation.
+      transportation, keyed by city1 + city2 + mode as loaded from JSON, or
+      by (city1, city2, mode) after prepare_travel_answer.
     user_solution: User"s travel plan in format: [(city1, city2,
       transportation_method), ...]
 
@@ -56,14 +58,10 @@ def score_travel_eval(
   # Check if the plan ends at city_end
   if not user_solution or user_solution[-1][1] != correct_answer["city_end"]:
     return False
-  if not _validate_connectivity(
+  if not _validate_travel(
       city_start=correct_answer["city_start"],
       num_cities=correct_answer["steps"],
       graph=correct_answer["graph"],
-      user_solution=user_solution
-  ):
-    return False
-  if not _validate_budget(
       costs=correct_answer["costs"],
       total_budget=correct_answer["total_budget"],
       user_solution=user_solution,
@@ -74,16 +72,59 @@ def score_travel_eval(
   return True
 
 
-def _validate_connectivity(
+def prepare_travel_answer(
+    correct_answer: dict[str, Union[str, float]],
+) -> dict[str, Union[str, float]]:
+  """Returns a copy of a travel answer with its costs keyed by tuples.
+
+  Call this once when the dataset is loaded. score_travel_eval accepts both
+  forms, but looks up tuple keys without building a new string for each step.
+
+  Args:
+    correct_answer: The correct answer details, as passed to score_travel_eval.
+
+  Returns:
+    A shallow copy of correct_answer whose "costs" are keyed by
+    (city1, city2, mode). correct_answer itself is not modified.
+  """
+  return {
+      **correct_answer,
+      "costs": _to_tuple_costs(
+          correct_answer["costs"], correct_answer["graph"]
+      ),
+  }
+
+
+def _to_tuple_costs(
+    costs: dict[Union[str, tuple[str, str, str]], float],
+    graph: dict[str, dict[str, list[str]]],
+) -> dict[tuple[str, str, str], float]:
+  """Keys the costs by (city1, city2, mode) instead of city1 + city2 + mode."""
+  if not costs or isinstance(next(iter(costs)), tuple):
+    return costs
+  tuple_costs = {}
+  for city1, destinations in graph.items():
+    for city2, modes in destinations.items():
+      for mode in modes:
+        cost = costs.get(city1 + city2 + mode)
+        if cost is not None:
+          tuple_costs[(city1, city2, mode)] = cost
+  return tuple_costs
+
+
+def _validate_travel(
     city_start: str,
     num_cities: int,
     graph: dict[str, dict[str, list[str]]],
+    costs: dict[Union[str, tuple[str, str, str]], float],
+    total_budget: float,
     user_solution: list[tuple[str, str, str]],
 ) -> bool:
-  """Checks that the travel plan satisfies connectivity constraints."""
-  # Validate each step in the travel plan
-  visited_cities = set()  # To track unique cities visited
+  """Checks the connectivity and budget constraints in a single pass."""
+  tuple_keys = isinstance(next(iter(costs), None), tuple)
+  visited_cities = {city_start}  # To track unique cities visited
   current_city = city_start
+  total_cost = 0
   for step in user_solution:
     if len(step) != 3:
       return False
@@ -100,34 +141,20 @@ def _validate_connectivity(
     # Validate continuity
     if city1 != current_city:
       return False
-    visited_cities.add(city1)
     current_city = city2
-    visited_cities.add(current_city)  # Add the final city to visited cities
+    visited_cities.add(current_city)
+
+    cost = costs.get(
+        (city1, city2, mode) if tuple_keys else city1 + city2 + mode
+    )
+    if cost is None:
+      return False
+    total_cost += cost
 
   # Check if the minimum number of unique cities is visited
   if len(visited_cities) < num_cities:
     return False
 
-  return True
-
-
-def _validate_budget(
-    costs: dict[str, float],
-    total_budget: float,
-    user_solution: list[tuple[str, str, str]],
-) -> bool:
-  """Checks that the travel plan satisfies the budget constraint."""
-  total_cost = 0
-  for step in user_solution:
-    city1, city2, mode = step
-    try:
-      if city1 + city2 + mode in costs:
-        total_cost += costs[city1 + city2 + mode]
-      else:
-        return False
-    except TypeError:
-      return False
-
   # Check if budget is exceeded
   if total_cost > total_budget:
     return False
@@ -137,8 +164,7 @@ def _validate_budget(
 def score_count_eval(correct_answer: Mapping[str, int], answer: list[int]):
   if not answer:
     return False
-  bools = (a1 == a2 for (a1, a2) in zip(answer, correct_answer.values()))
-  return all(bools)
+  return all(map(operator.eq, answer, correct_answer.values()))
 
 
 def score_mathgap_eval(correct_answer: str, answer: str):
@@ -155,15 +181,18 @@ def score_unpuzzle_eval(s1: str, s2: str):
   return s1.lower().strip(" ") == s2.lower().strip(" ")
 
 
+_SCORERS = {
+    "character_count": score_count_eval,
+    "word_count": score_count_eval,
+    "mathgap_diverse": score_mathgap_eval,
+    "mathgap_irrelevant": score_mathgap_eval,
+    "travel": score_travel_eval,
+    "logic_negation": score_logic_eval,
+    "logic_evaluation": score_logic_eval,
+}
+
+
 def score_eval(json_entry, answer) -> bool:
   """Scores an extracted answer from an LLM response."""
-  if json_entry["task"] in ["character_count", "word_count"]:
-    return score_count_eval(json_entry["answer"], answer)
-  elif json_entry["task"] in ["mathgap_diverse", "mathgap_irrelevant"]:
-    return score_mathgap_eval(json_entry["answer"], answer)
-  elif json_entry["task"] == "travel":
-    return score_travel_eval(json_entry["answer"], answer)
-  elif json_entry["task"] in ["logic_negation", "logic_evaluation"]:
-    return score_logic_eval(json_entry["answer"], answer)
-  else:
-    return False
+  scorer = _SCORERS.get(json_entry["task"])
+  return scorer(json_entry["answer"], answer) if scorer else False
@@ -0,0 +1,107 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+
+import json
+
+from absl.testing import absltest
+
+import answer_scoring
+
+
+def _travel_answer():
+  return {
+      "city_start": "Fresno",
+      "city_end": "Boise",
+      "total_budget": 30,
+      "steps": 3,
+      "graph": {
+          "Fresno": {"Irvine": ["motorhome"]},
+          "Irvine": {"Boise": ["flight", "car"]},
+      },
+      "costs": {
+          "FresnoIrvinemotorhome": 10,
+          "IrvineBoiseflight": 20,
+          "IrvineBoisecar": 25,
+      },
+  }
+
+
+class AnswerScoringTest(absltest.TestCase):
+
+  def test_to_tuple_costs(self):
+    answer = _travel_answer()
+    self.assertEqual(
+        answer_scoring._to_tuple_costs(answer["costs"], answer["graph"]),
+        {
+            ("Fresno", "Irvine", "motorhome"): 10,
+            ("Irvine", "Boise", "flight"): 20,
+            ("Irvine", "Boise", "car"): 25,
+        },
+    )
+
+  def test_prepare_travel_answer(self):
+    answer = _travel_answer()
+    prepared = answer_scoring.prepare_travel_answer(answer)
+    self.assertEqual(answer, _travel_answer())
+    self.assertEqual(
+        prepared["costs"][("Irvine", "Boise", "flight")], 20
+    )
+    self.assertEqual(prepared["graph"], answer["graph"])
+
+  def test_score_travel_eval(self):
+    answer = _travel_answer()
+    plan = [("Fresno", "Irvine", "motorhome"), ("Irvine", "Boise", "flight")]
+    self.assertTrue(answer_scoring.score_travel_eval(answer, plan))
+    # The caller's entry is left untouched, so it still serializes to JSON.
+    self.assertEqual(answer, _travel_answer())
+    json.dumps(answer)
+    self.assertTrue(
+        answer_scoring.score_travel_eval(
+            answer_scoring.prepare_travel_answer(answer), plan
+        )
+    )
+    # Steps loaded from JSON are lists rather than tuples.
+    self.assertTrue(
+        answer_scoring.score_travel_eval(answer, [list(s) for s in plan])
+    )
+    self.assertTrue(
+        answer_scoring.score_travel_eval(
+            answer_scoring.prepare_travel_answer(answer),
+            [list(s) for s in plan],
+        )
+    )
+    self.assertFalse(
+        answer_scoring.score_travel_eval(
+            answer,
+            [("Fresno", "Irvine", "motorhome"), ("Irvine", "Boise", "car")],
+        )
+    )
+    self.assertFalse(
+        answer_scoring.score_travel_eval(
+            answer, [("Fresno", "Boise", "flight")]
+        )
+    )
+    self.assertFalse(answer_scoring.score_travel_eval(answer, []))
+
+  def test_score_count_eval(self):
+    correct_answer = {"apple": 3, "pear": 4}
+    self.assertTrue(answer_scoring.score_count_eval(correct_answer, [3, 4]))
+    self.assertFalse(answer_scoring.score_count_eval(correct_answer, [3, 5]))
+    self.assertFalse(answer_scoring.score_count_eval(correct_answer, [""]))
+    self.assertFalse(answer_scoring.score_count_eval(correct_answer, []))
+
+
+if __name__ == "__main__":
+  absltest.main()